@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import pytest
+
+import inkex
+from inkex.paths import Path
+
+import union
+import union_kernels
+
+
+def _document(body):
+    return inkex.load_svg(
+        '<svg xmlns="http://www.w3.org/2000/svg">' + body + '</svg>'
+    ).getroot()
+
+
+def _absolute(d):
+    return str(Path(d).to_absolute())
+
+
+def test_union_relative_operand_starts_from_origin():
+    svg = _document(
+        '<path id="a" d="M 5 5 h 10 v 10 z"/>'
+        '<path id="b" d="m 50 50 h 10 v 10 z"/>'
+    )
+    result = union.PathOperations().union_paths(
+        [svg.getElementById("a"), svg.getElementById("b")])
+    assert _absolute(result.get("d")) == (
+        "M 5 5 H 15 V 15 Z M 50 50 H 60 V 60 Z")
+
+
+def test_union_relative_operands_in_scaled_group():
+    svg = _document(
+        '<path id="a" d="m 10 0 h 10 v 10 z"/>'
+        '<g transform="scale(2)"><path id="b" d="m 10 5 h 5 v 5 z"/></g>'
+    )
+    result = union.PathOperations().union_paths(
+        [svg.getElementById("a"), svg.getElementById("b")])
+    subpaths = _absolute(result.get("d")).split(" M ")
+    assert subpaths[1].startswith("20 10 ")
+
+
+def test_path_rings_line_after_close_starts_new_ring():
+    pts, offsets = union._path_rings(Path("M 0 0 L 4 0 L 4 4 Z L 5 5 L 6 6"))
+    assert offsets.tolist() == [0, 3, 6]
+    assert pts.tolist() == [[0, 0], [4, 0], [4, 4], [0, 0], [5, 5], [6, 6]]
+
+
+def test_path_rings_rejects_curves_and_axis_lines():
+    assert union._path_rings(Path("M 0 0 H 4 V 4 Z")) is None
+    assert union._path_rings(Path("M 0 0 C 1 1 2 1 3 0 Z")) is None
+
+
+def test_path_rings_empty_path():
+    assert union._path_rings(Path()) is None
+
+
+
+@pytest.mark.parametrize("d", [
+    "M 0 0 1 1 2 2",
+    "m 1 1 2 2 3 3 z",
+    "M10-5L20-5",
+    "M.5.5L1.5.5",
+    "M 1e-5 2E+3 L -.5 -1.",
+    "M 0,0 h 5 v 5 H 0 Z",
+    "m 1 2 c 1 2 3 4 5 6 s 1 2 3 4 q 1 2 3 4 t 5 6 z",
+    "M 0 0 A 5 5 0 1 1 10 10 5 5 0 0 0 20 20",
+    "M0 0A5 5 0 0110 10",
+    "M0 0A5 5 0 0110 10 1 1",
+    "M 0 0 L 1 1 x",
+    "M 0 0 L 1",
+    "   ",
+])
+def test_parse_d_matches_inkex(d):
+    assert str(union._parse_d(d)) == str(Path(d))
+
+
+@pytest.mark.skipif(not union_kernels.HAVE_NUMBA, reason="numba not installed")
+def test_polygons_disjoint():
+    square = Path("M 0 0 L 10 0 L 10 10 L 0 10 Z")
+    assert union._polygons_disjoint(square, Path("M 20 0 L 30 0 L 30 10 Z"))
+    # The triangle's box overlaps the square but its area does not
+    assert union._polygons_disjoint(square, Path("M 9 12 L 20 12 L 20 1 Z"))
+    assert not union._polygons_disjoint(square, Path("M 5 5 L 15 5 L 15 15 Z"))
+    assert not union._polygons_disjoint(square, Path("M 0 0 C 1 1 2 1 3 0 Z"))
+
+
+def _run_effect(tmp_path, body, *args):
+    source = tmp_path / "in.svg"
+    source.write_text(
+        '<svg xmlns="http://www.w3.org/2000/svg">' + body + '</svg>')
+    output = tmp_path / "out.svg"
+    union.PathOperations().run(list(args) + [str(source)], str(output))
+    return inkex.load_svg(str(output)).getroot()
+
+
+def test_effect_keeps_geometry_inside_transformed_group(tmp_path):
+    svg = _run_effect(
+        tmp_path,
+        '<g id="g" transform="translate(100,50) scale(2)">'
+        '<rect id="r" width="1" height="1"/>'
+        '<path id="a" d="M 0 0 L 10 0 L 10 10 Z"/>'
+        '<circle id="c" r="1"/></g>'
+        '<path id="b" d="M 200 200 L 210 200 L 210 210 Z"/>',
+        "--operation", "union", "--id", "a", "--id", "b",
+    )
+    group = svg.getElementById("g")
+    assert svg.getElementById("a") is None
+    assert svg.getElementById("b") is None
+    result = group[1]
+    assert result.tag == inkex.addNS("path", "svg")
+    assert group[2].get("id") == "c"
+    document_d = Path(result.get("d")).transform(result.composed_transform())
+    assert _absolute(str(document_d)) == (
+        "M 100 50 L 120 50 L 120 70 Z M 200 200 L 210 200 L 210 210 Z")
+
+
+def test_effect_leaves_collapsed_group_untouched(tmp_path):
+    svg = _run_effect(
+        tmp_path,
+        '<g id="g" transform="scale(0)">'
+        '<path id="a" d="M 0 0 L 10 0 L 10 10 Z"/></g>'
+        '<path id="b" d="M 200 200 L 210 200 L 210 210 Z"/>',
+        "--operation", "union", "--id", "a", "--id", "b",
+    )
+    assert len(svg.getElementById("g")) == 1
+    assert svg.getElementById("a") is not None
+    assert svg.getElementById("b") is not None
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import math
+
+import numpy as np
+
+from union_kernels import bbox_f64, point_in_ring, rings_disjoint
+
+
+def _rings(*rings):
+    pts = np.concatenate([np.asarray(ring, dtype=np.float64) for ring in rings])
+    offsets = np.cumsum([0] + [len(ring) for ring in rings]).astype(np.int64)
+    return pts, offsets
+
+
+def _pentagram(cx, cy, r):
+    # Visiting every second point of a pentagon crosses the ring over itself,
+    # leaving a centre with winding number 2
+    return [(cx + r * math.sin(4 * math.pi * k / 5),
+             cy - r * math.cos(4 * math.pi * k / 5)) for k in range(5)]
+
+
+def _square(x, y, size):
+    return [(x, y), (x + size, y), (x + size, y + size), (x, y + size)]
+
+
+def test_bbox():
+    pts = np.array([(1.0, 5.0), (-2.0, 3.0), (4.0, -1.0)])
+    assert bbox_f64(pts).tolist() == [-2.0, -1.0, 4.0, 5.0]
+
+
+def test_point_in_ring_nonzero_centre_of_pentagram():
+    star = np.asarray(_pentagram(0.0, 0.0, 100.0))
+    assert point_in_ring(0.0, 0.0, star)
+    assert not point_in_ring(200.0, 0.0, star)
+
+
+def test_separate_squares_are_disjoint():
+    a = _rings(_square(0.0, 0.0, 10.0))
+    b = _rings(_square(20.0, 0.0, 10.0))
+    assert rings_disjoint(a[0], a[1], b[0], b[1])
+
+
+def test_overlapping_squares_are_not_disjoint():
+    a = _rings(_square(0.0, 0.0, 10.0))
+    b = _rings(_square(5.0, 5.0, 10.0))
+    assert not rings_disjoint(a[0], a[1], b[0], b[1])
+
+
+def test_square_inside_pentagram_centre_is_not_disjoint():
+    star = _rings(_pentagram(0.0, 0.0, 100.0))
+    square = _rings(_square(-5.0, -5.0, 10.0))
+    assert not rings_disjoint(star[0], star[1], square[0], square[1])
+    assert not rings_disjoint(square[0], square[1], star[0], star[1])
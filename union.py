@@ -1,69 +1,344 @@
 #!/usr/bin/env python
 # coding=utf-8
 
+import re
+from collections import defaultdict
+from itertools import chain, islice
+
+import numpy as np
+
 import inkex
-from inkex.paths import Path
+from inkex.paths import Move, Path, PathCommand
 from lxml import etree
 
+# Parsed "d" attributes, keyed by the raw string. Elements that take part in
+# several operations (or share identical geometry) are only tokenized once.
+_PATH_CACHE = {}
+
+# Argument counts of every path command, for the bulk "d" tokenizer.
+_ARITY = {"M": 2, "L": 2, "H": 1, "V": 1, "C": 6, "S": 4, "Q": 4, "T": 2, "A": 7, "Z": 0}
+_ARITY.update({letter.lower(): count for letter, count in _ARITY.items()})
+_SEGMENT_CLASSES = {letter: PathCommand.letter_to_class(letter) for letter in _ARITY}
+# Extra coordinate pairs after a moveto are implicit linetos.
+_IMPLICIT_NEXT = {"M": "L", "m": "l"}
+_COMMAND_SPLIT_REX = re.compile(r"([MLHVCSQTAZmlhvcsqtaz])")
+# Anything the bulk tokenizer cannot split on separators alone: characters
+# outside commands, numbers and separators, a sign right after a digit or
+# dot ("10-5") and a second dot in one number (".5.5").
+_FALLBACK_REX = re.compile(
+    r"[^MLHVCSQTAZmlhvcsqtaz0-9eE.+\- \t\r\n\f,]|[0-9.][+-]|\.[0-9]*\.")
+
+# Transform.matrix of the identity; paths already in document space skip
+# the segment walk entirely.
+_IDENTITY_MATRIX = ((1.0, 0.0, 0.0), (0.0, 1.0, 0.0))
+
+# Decimal places kept in the output "d"; Inkscape works well below this.
+_OUTPUT_DECIMALS = 4
+
+
+def _bulk_parse_d(path_data):
+    """
+    Tokenizes a "d" string, converting all of its numbers in one NumPy call.
+
+    Only handles numbers separated by whitespace or commas; compact forms
+    such as "10-5" or "1.5.5" are detected up front and raise ValueError.
+
+    Args:
+        path_data (str): The raw path data.
+
+    Returns:
+        list: (command, args) tuples with implicit repeats made explicit.
+
+    Raises:
+        ValueError: On anything but plain, well-formed path data, so the
+            caller can leave the edge cases to inkex's own parser.
+    """
+    if _FALLBACK_REX.search(path_data):
+        raise ValueError("Path data needs the full parser")
+    pieces = _COMMAND_SPLIT_REX.split(path_data)
+    if pieces[0].strip(" \t\r\n\f,"):
+        raise ValueError("Path data must start with a command")
+    chunks = [chunk.replace(",", " ").split() for chunk in pieces[2::2]]
+    values = np.array(list(chain.from_iterable(chunks)), dtype=np.float64).tolist()
+
+    tokens = []
+    append = tokens.append
+    pos = 0
+    for cmd, chunk in zip(pieces[1::2], chunks):
+        arity = _ARITY[cmd]
+        count = len(chunk)
+        if not arity:
+            if count:
+                raise ValueError(f"Unexpected arguments for '{cmd}'")
+            append((cmd, ()))
+            continue
+        if not count or count % arity:
+            raise ValueError(f"Incomplete arguments for '{cmd}'")
+        for start in range(pos, pos + count, arity):
+            append((cmd, tuple(values[start:start + arity])))
+            cmd = _IMPLICIT_NEXT.get(cmd, cmd)
+        pos += count
+    return tokens
+
+
+def _parse_d(path_data):
+    """
+    Parses a "d" string, building segments straight from the bulk tokenizer.
+
+    The bulk tokenizer covers the common, separator-delimited case; compact
+    number forms and anything else it rejects are left to inkex.
+    """
+    try:
+        tokens = _bulk_parse_d(path_data)
+    except ValueError:
+        return Path(path_data)
+    path = Path()
+    path.extend([_SEGMENT_CLASSES[cmd](*args) for cmd, args in tokens])
+    return path
+
+
+def _parse_cached(path_data):
+    """
+    Returns a Path parsed from the given "d" string, reusing earlier parses.
+
+    The cached Path itself is returned and must not be modified in place;
+    transforms and concatenation here all build new paths.
+    """
+    path = _PATH_CACHE.get(path_data)
+    if path is None:
+        path = _PATH_CACHE[path_data] = _parse_d(path_data)
+    return path
+
+
+def _format_d(path):
+    """
+    Serializes a path the way Path.__str__ does, rounding each argument.
+
+    Rounding happens while formatting, so float noise (e.g. 1e-07) never
+    reaches the file and no rounded copy of the path is built.
+    """
+    return " ".join([
+        " ".join([seg.letter] + [
+            # "+ 0.0" turns a rounded -0.0 into 0.0
+            seg.number_template.format(round(arg, _OUTPUT_DECIMALS) + 0.0)
+            for arg in seg.args
+        ])
+        for seg in path
+    ])
+
+
+def _bbox(path):
+    """
+    Returns a conservative (xmin, ymin, xmax, ymax) box around a path.
+
+    Bezier curves lie inside the hull of their control points, so the control
+    points bound everything but arcs, which fall back to inkex's exact box.
+    """
+    if any(seg.letter in "Aa" for seg in path):
+        box = path.bounding_box()
+        return (box.left, box.top, box.right, box.bottom)
+    pts = np.asarray([(pt.x, pt.y) for pt in path.control_points], dtype=np.float64)
+    if not len(pts):
+        # An inverted box is disjoint from everything, as an empty path is
+        return (np.inf, np.inf, -np.inf, -np.inf)
+    xmin, ymin = pts.min(0)
+    xmax, ymax = pts.max(0)
+    return (xmin, ymin, xmax, ymax)
+
+
+def _bbox_area(box):
+    """Returns the area of an (xmin, ymin, xmax, ymax) box, 0 if inverted."""
+    return max(box[2] - box[0], 0.0) * max(box[3] - box[1], 0.0)
+
+
+def _bboxes_disjoint(a, b):
+    """Returns True if two (xmin, ymin, xmax, ymax) boxes cannot overlap."""
+    return a[2] < b[0] or a[0] > b[2] or a[3] < b[1] or a[1] > b[3]
+
+
+def _path_rings(path):
+    """
+    Flattens a path made only of straight segments into polygon rings.
+
+    Returns:
+        tuple: (pts, offsets) arrays in the layout union_kernels expects, or
+        None if the path contains curves or is empty.
+    """
+    pts = []
+    offsets = []
+    start = None
+    closed = False
+    for seg in path.to_absolute():
+        letter = seg.letter
+        if letter == "M":
+            start = tuple(seg.args)
+            offsets.append(len(pts))
+            pts.append(start)
+            closed = False
+        elif letter == "L":
+            if closed:
+                # Drawing on after Z starts a new subpath at the old start
+                offsets.append(len(pts))
+                pts.append(start)
+                closed = False
+            pts.append(tuple(seg.args))
+        elif letter == "Z":
+            closed = True
+        else:
+            return None
+    if not pts:
+        return None
+    offsets.append(len(pts))
+    return np.asarray(pts, dtype=np.float64), np.asarray(offsets, dtype=np.int64)
+
+
+def _polygons_disjoint(a, b):
+    """
+    Returns True if two straight-edged paths provably share no area.
+
+    Curved paths are never rejected here; only the bounding box test applies
+    to them.
+    """
+    # Imported here so that union-only runs never pay numba's import cost
+    from union_kernels import HAVE_NUMBA, rings_disjoint
+    if not HAVE_NUMBA:
+        # Without numba the ring test is too slow to pay for itself
+        return False
+    a_rings = _path_rings(a)
+    if a_rings is None:
+        return False
+    b_rings = _path_rings(b)
+    if b_rings is None:
+        return False
+    return rings_disjoint(a_rings[0], a_rings[1], b_rings[0], b_rings[1])
+
 class PathOperations(inkex.EffectExtension):
 
-    def union_paths(self, selected_paths):
+    def _transform_all(self, selected_paths, transforms=None):
         """
-        Unions the given paths into a single path.
+        Parses every element's path data and maps it into document coordinates.
 
         Args:
             selected_paths (list): A list of Inkscape PathElement objects.
+            transforms (dict): Optional composed transforms keyed by id(element).
 
         Returns:
-            inkex.PathElement: The resulting unioned path, or None on error.
+            list: The transformed paths in selection order, or None on error.
         """
-        combined_path = Path()
-        first_path = None  # Store the first path for style copying
-
-        for i, p in enumerate(selected_paths):
+        paths = []
+        append = paths.append
+        for p in selected_paths:
             try:
-                path_data = p.get('d')
-                if path_data:
-                    path = Path(path_data)
-                    transform = p.composed_transform()
-                    if transform is not None:
-                        combined_path.append(path.transform(transform))
-                    else:
-                        combined_path.append(path)
-                    if i == 0:
-                        first_path = p
+                path = _parse_cached(p.get('d'))
+                if transforms is not None:
+                    transform = transforms[id(p)]
                 else:
-                    inkex.errormsg(f"Path with id '{p.get_id()}' has no path data.")
-                    return None
+                    transform = p.composed_transform()
+                if transform is not None and transform.matrix != _IDENTITY_MATRIX:
+                    path = path.transform(transform)
             except Exception as e:
                 inkex.errormsg(f"Error processing path with id '{p.get_id()}': {e}")
                 return None
+            append(path)
+        return paths
+
+    def _combine_transformed(self, selected_paths, transforms=None):
+        """
+        Concatenates the transformed geometry of the given paths.
+
+        Args:
+            selected_paths (list): A list of Inkscape PathElement objects.
+            transforms (dict): Optional composed transforms keyed by id(element).
 
-        if not combined_path or len(combined_path) == 0:
+        Returns:
+            inkex.paths.Path: The combined path, or None on error.
+        """
+        parts = self._transform_all(selected_paths, transforms)
+        if parts is None:
             return None
 
-        # Create a new path element
-        union_path = inkex.PathElement()
-        union_path.set('d', combined_path)
+        # Splice all segments in once rather than growing the path per element.
+        # A leading relative moveto is measured from the origin only while it
+        # opens the path, so it is made absolute before following another part.
+        combined_path = Path()
+        combined_path.extend(chain.from_iterable(
+            chain((Move(*part[0].args),), islice(part, 1, None))
+            if part and part[0].letter == "m" else part
+            for part in parts
+        ))
+        return combined_path
+
+    @staticmethod
+    def _filter_path_elements(selected_objects):
+        """
+        Picks the path elements out of a selection, reporting everything else.
+
+        Paths without path data are rejected here, before any parsing, so the
+        operations themselves never have to bail out part-way.
+
+        Args:
+            selected_objects (inkex.elements.ElementList): The current selection.
+
+        Returns:
+            list: The selected Inkscape PathElement objects, in selection order.
+        """
+        selected_paths = []
+        for obj_id, obj in selected_objects.items():
+            if not isinstance(obj, inkex.PathElement):
+                inkex.errormsg(f"Object with id '{obj_id}' is not a path and will be ignored.")
+            elif not obj.get('d'):
+                inkex.errormsg(f"Path with id '{obj_id}' has no path data and will be ignored.")
+            else:
+                selected_paths.append(obj)
+        return selected_paths
+
+    @staticmethod
+    def _new_path_element(path, style_source):
+        """
+        Creates the result element for an operation.
+
+        Args:
+            path (inkex.paths.Path): The geometry, in document coordinates.
+            style_source (inkex.PathElement): The element whose style is copied.
 
-        # Copy style from the first selected path
-        if first_path is not None:
-            union_path.style.update(first_path.style)
-        return union_path
+        Returns:
+            inkex.PathElement: The new, not yet attached, path element.
+        """
+        result = inkex.PathElement()
+        # Serialize exactly once; the PathElement.path setter would first
+        # copy the whole path through Path() before doing the same str()
+        result.set('d', _format_d(path))
+        result.style.update(style_source.style)
+        return result
 
-    def intersect_paths(self, selected_paths):
+    def union_paths(self, selected_paths, transforms=None):
+        """
+        Unions the given paths into a single path.
+
+        Args:
+            selected_paths (list): A list of Inkscape PathElement objects.
+            transforms (dict): Optional composed transforms keyed by id(element).
+
+        Returns:
+            inkex.PathElement: The resulting unioned path, or None on error.
+        """
+        combined_path = self._combine_transformed(selected_paths, transforms)
+        if not combined_path:
+            return None
+
+        return self._new_path_element(combined_path, selected_paths[0])
+
+    def intersect_paths(self, selected_paths, transforms=None):
         """
         Intersects the given paths, returning the common area.
 
         Args:
             selected_paths (list): A list of Inkscape PathElement objects.
+            transforms (dict): Optional composed transforms keyed by id(element).
 
         Returns:
             inkex.PathElement: The resulting intersection path, or None on error.
         """
-        intersected_path = None
-        first_path = None
-
         if not selected_paths:
             return None
 
@@ -71,63 +346,65 @@ class PathOperations(inkex.EffectExtension):
             inkex.errormsg("Intersection requires at least two paths.")
             return None
 
-        # Initialize intersected_path with the first path
-        try:
-            first_path_element = selected_paths[0]
-            path_data = first_path_element.get('d')
-            if path_data:
-                intersected_path = Path(path_data)
-                transform = first_path_element.composed_transform()
-                if transform:
-                    intersected_path = intersected_path.transform(transform)
-                first_path = first_path_element
-            else:
-                inkex.errormsg(f"Path with id '{first_path_element.get_id()}' has no path data.")
-                return None
-        except Exception as e:
-            inkex.errormsg(f"Error processing first path: {e}")
+        first_path = selected_paths[0]
+
+        # Transform every path up front and start from the smallest, so the
+        # running intersection shrinks as early as possible
+        transformed_paths = self._transform_all(selected_paths, transforms)
+        if transformed_paths is None:
             return None
+        operands = []
+        append = operands.append
+        for transformed_path, p in zip(transformed_paths, selected_paths):
+            bb = _bbox(transformed_path)
+            append((transformed_path, bb, _bbox_area(bb), p))
+        operands.sort(key=lambda operand: operand[2])
 
-        # Intersect with the remaining paths
-        for p in selected_paths[1:]:
+        # Intersect the smallest path with the remaining ones
+        remaining = iter(operands)
+        intersected_path, acc_bb = next(remaining)[:2]
+        for transformed_path, bb, _area, p in remaining:
+            if _bboxes_disjoint(bb, acc_bb) or \
+                    _polygons_disjoint(intersected_path, transformed_path):
+                # Nothing can be shared, so skip the geometric intersection
+                intersected_path = Path()
+                break
+            # The result lies inside both boxes, so their overlap bounds it
+            acc_bb = (max(bb[0], acc_bb[0]), max(bb[1], acc_bb[1]),
+                      min(bb[2], acc_bb[2]), min(bb[3], acc_bb[3]))
             try:
-                path_data = p.get('d')
-                if path_data:
-                    path = Path(path_data)
-                    transform = p.composed_transform()
-                    if transform is not None:
-                        transformed_path = path.transform(transform)
-                    else:
-                        transformed_path = path
-                    intersected_path = intersected_path.intersect(transformed_path)
-                else:
-                    inkex.errormsg(f"Path with id '{p.get_id()}' has no path data.")
-                    return None
-                if not intersected_path:
-                    inkex.errormsg("Intersection resulted in an empty path.")
-                    return None
-
+                intersected_path = intersected_path.intersect(transformed_path)
             except Exception as e:
                 inkex.errormsg(f"Error processing path with id '{p.get_id()}': {e}")
                 return None
+            # Empty, or a lone moveto: intersecting further cannot add area
+            if intersected_path is None or len(intersected_path) <= 1:
+                break
 
-        # Create a new path element for the intersection
-        if intersected_path and len(intersected_path) > 0:
-            intersection_path = inkex.PathElement()
-            intersection_path.set('d', intersected_path)
-            # Copy style from the first selected path
-            if first_path:
-                intersection_path.style.update(first_path.style)
-            return intersection_path
-        else:
+        if intersected_path is None or len(intersected_path) <= 1:
+            inkex.errormsg("Intersection resulted in an empty path.")
             return None
 
-
+        return self._new_path_element(intersected_path, first_path)
 
     def effect(self):
+        # -- User interaction to choose operation --
+        # In a real extension, you'd use a dialog, but for simplicity,
+        # we'll just check for a parameter named 'operation'
+        # Default to 'union' if not provided
+        operation = self.options.operation if hasattr(self.options, 'operation') else 'union'
+
+        # Resolve the operation once, before any selection or geometry work
+        if operation == 'union':
+            combine = self.union_paths
+        elif operation == 'intersect':
+            combine = self.intersect_paths
+        else:
+            inkex.errormsg(f"Unknown operation: {operation}.  Use 'union' or 'intersect'.")
+            return
+
         # Get selected objects
         selected_objects = self.svg.selection
-        selected_paths = []
 
         if not selected_objects:
             raise inkex.AbortExtension(_("Please select at least two paths to operate on."))
@@ -135,35 +412,44 @@ class PathOperations(inkex.EffectExtension):
         if len(selected_objects) < 2:
             raise inkex.AbortExtension(_("Please select at least two paths to operate on."))
 
-        for obj_id, obj in selected_objects.items():
-            if isinstance(obj, inkex.PathElement):
-                selected_paths.append(obj)
-            else:
-                inkex.errormsg(f"Object with id '{obj_id}' is not a path and will be ignored.")
+        selected_paths = self._filter_path_elements(selected_objects)
 
         if len(selected_paths) < 2:
             raise inkex.AbortExtension(_("Please select at least two path objects to operate on. Ensure objects are converted to paths."))
 
-        # -- User interaction to choose operation --
-        # In a real extension, you'd use a dialog, but for simplicity,
-        # we'll just check for a parameter named 'operation'
-        # Default to 'union' if not provided
-        operation = self.options.operation if hasattr(self.options, 'operation') else 'union'
-
-        if operation == 'union':
-            result_path = self.union_paths(selected_paths)
-        elif operation == 'intersect':
-            result_path = self.intersect_paths(selected_paths)
-        else:
-            inkex.errormsg(f"Unknown operation: {operation}.  Use 'union' or 'intersect'.")
-            return
+        # Walk each element's ancestor chain once for the whole run
+        transforms = {id(p): p.composed_transform() for p in selected_paths}
+        result_path = combine(selected_paths, transforms)
 
         if result_path is not None:
-            # Delete the original paths
+            # Take the first path's place so the stacking order is kept. The
+            # result is in document coordinates, so cancel out whatever
+            # transform its new parent applies.
+            first_path = selected_paths[0]
+            first_parent = first_path.getparent()
+            parent_transform = first_parent.composed_transform()
+            if parent_transform:
+                try:
+                    result_path.transform = -parent_transform
+                except ZeroDivisionError:
+                    # A collapsed parent (e.g. scale(0)) cannot show the
+                    # result anywhere, so leave the document untouched.
+                    inkex.errormsg("Cannot place the result: the parent group's transform is not invertible.")
+                    return
+            first_parent.insert(first_parent.index(first_path), result_path)
+
+            # Delete the original paths only once the result exists, so a
+            # failure part-way through never leaves the document half-edited.
+            # Grouping by parent resolves each parent once for the batch.
+            by_parent = defaultdict(list)
             for p in selected_paths:
-                p.delete()
-            # Add the new path to the document
-            self.svg.get_current_layer().append(result_path)
+                by_parent[p.getparent()].append(p)
+            for parent, children in by_parent.items():
+                if parent is None:
+                    continue
+                remove = parent.remove
+                for child in children:
+                    remove(child)
         else:
              inkex.errormsg("Operation failed to produce a path.")
 
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+Numeric kernels used by union.py to reject disjoint path pairs cheaply.
+
+Points are (N, 2) float64 arrays. A set of polygon rings is stored as one
+point array plus an offsets array, where ring i spans
+pts[offsets[i]:offsets[i + 1]] and is implicitly closed.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    # numba is optional; without it the kernels are ordinary Python functions
+    HAVE_NUMBA = False
+
+    def njit(**kwargs):
+        return lambda func: func
+
+
+@njit(cache=True)
+def bbox_f64(pts):
+    """Returns (xmin, ymin, xmax, ymax) of a non-empty point array."""
+    xmin = xmax = pts[0, 0]
+    ymin = ymax = pts[0, 1]
+    for i in range(1, pts.shape[0]):
+        x = pts[i, 0]
+        y = pts[i, 1]
+        if x < xmin:
+            xmin = x
+        elif x > xmax:
+            xmax = x
+        if y < ymin:
+            ymin = y
+        elif y > ymax:
+            ymax = y
+    return np.array([xmin, ymin, xmax, ymax])
+
+
+@njit(cache=True)
+def _orient(ax, ay, bx, by, cx, cy):
+    return (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+
+
+@njit(cache=True)
+def point_in_ring(x, y, ring):
+    """
+    Returns True if (x, y) lies inside a closed ring under the nonzero rule.
+
+    Nonzero covers everything even-odd does, so the test stays conservative
+    for either fill-rule, including self-intersecting rings.
+    """
+    winding = 0
+    n = ring.shape[0]
+    j = n - 1
+    for i in range(n):
+        xj = ring[j, 0]
+        yj = ring[j, 1]
+        xi = ring[i, 0]
+        yi = ring[i, 1]
+        if yj <= y:
+            if yi > y and _orient(xj, yj, xi, yi, x, y) > 0.0:
+                winding += 1
+        elif yi <= y and _orient(xj, yj, xi, yi, x, y) < 0.0:
+            winding -= 1
+        j = i
+    return winding != 0
+
+
+@njit(cache=True)
+def _within(ax, ay, bx, by, cx, cy):
+    # Whether collinear point c falls inside the box spanned by a and b
+    return (min(ax, bx) <= cx <= max(ax, bx)
+            and min(ay, by) <= cy <= max(ay, by))
+
+
+@njit(cache=True)
+def _segments_touch(ax, ay, bx, by, cx, cy, dx, dy):
+    d1 = _orient(cx, cy, dx, dy, ax, ay)
+    d2 = _orient(cx, cy, dx, dy, bx, by)
+    d3 = _orient(ax, ay, bx, by, cx, cy)
+    d4 = _orient(ax, ay, bx, by, dx, dy)
+    if ((d1 > 0.0 and d2 < 0.0) or (d1 < 0.0 and d2 > 0.0)) and \
+            ((d3 > 0.0 and d4 < 0.0) or (d3 < 0.0 and d4 > 0.0)):
+        return True
+    return ((d1 == 0.0 and _within(cx, cy, dx, dy, ax, ay))
+            or (d2 == 0.0 and _within(cx, cy, dx, dy, bx, by))
+            or (d3 == 0.0 and _within(ax, ay, bx, by, cx, cy))
+            or (d4 == 0.0 and _within(ax, ay, bx, by, dx, dy)))
+
+
+@njit(cache=True)
+def _edges_touch(a_pts, a_offsets, b_pts, b_offsets):
+    for ra in range(a_offsets.shape[0] - 1):
+        a_start = a_offsets[ra]
+        a_end = a_offsets[ra + 1]
+        for i in range(a_start, a_end):
+            k = i + 1 if i + 1 < a_end else a_start
+            for rb in range(b_offsets.shape[0] - 1):
+                b_start = b_offsets[rb]
+                b_end = b_offsets[rb + 1]
+                for j in range(b_start, b_end):
+                    m = j + 1 if j + 1 < b_end else b_start
+                    if _segments_touch(a_pts[i, 0], a_pts[i, 1],
+                                       a_pts[k, 0], a_pts[k, 1],
+                                       b_pts[j, 0], b_pts[j, 1],
+                                       b_pts[m, 0], b_pts[m, 1]):
+                        return True
+    return False
+
+
+@njit(cache=True)
+def _any_vertex_inside(a_pts, b_pts, b_offsets):
+    for rb in range(b_offsets.shape[0] - 1):
+        ring = b_pts[b_offsets[rb]:b_offsets[rb + 1]]
+        if ring.shape[0] < 3:
+            continue
+        for i in range(a_pts.shape[0]):
+            if point_in_ring(a_pts[i, 0], a_pts[i, 1], ring):
+                return True
+    return False
+
+
+@njit(cache=True)
+def rings_disjoint(a_pts, a_offsets, b_pts, b_offsets):
+    """
+    Returns True only if the areas enclosed by two ring sets cannot overlap.
+
+    Every filled point has a nonzero winding number around at least one
+    ring, whichever fill-rule is in effect, so with no crossing
+    edges and no vertex of one set inside a ring of the other, the fills are
+    disjoint. Touching counts as overlap, keeping the answer conservative.
+    """
+    if _edges_touch(a_pts, a_offsets, b_pts, b_offsets):
+        return False
+    if _any_vertex_inside(a_pts, b_pts, b_offsets):
+        return False
+    return not _any_vertex_inside(b_pts, a_pts, a_offsets)